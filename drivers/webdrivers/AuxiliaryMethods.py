@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import os
+import time
+import weakref
 from typing import Tuple, Optional
 
+from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.ui import WebDriverWait
@@ -13,7 +16,112 @@ from selenium.common.exceptions import TimeoutException
 Locator = Tuple[str, str]  # (By.ID, "foo") etc.
 
 DEFAULT_TIMEOUT = int(os.getenv("SELENIUM_TIMEOUT", "10"))
-DEFAULT_POLL = float(os.getenv("SELENIUM_POLL", "0.2"))
+# Timeout para comprobaciones donde lo esperado es que el elemento NO esté (p.ej. `exists`)
+NEGATIVE_TIMEOUT = float(os.getenv("SELENIUM_NEG_TIMEOUT", "0"))
+DEFAULT_POLL = float(os.getenv("SELENIUM_POLL", "0.5"))
+# A partir de esta longitud `type_text` escribe vía JS en lugar de `send_keys`
+JS_TYPE_MIN_LEN = int(os.getenv("SELENIUM_JS_TYPE_MIN_LEN", "200"))
+
+# Asigna `value` y dispara `input`/`change` en un único `execute_script`. Usa el
+# setter nativo del prototipo (frameworks como React ignoran `el.value = ...`) y
+# devuelve `false` si el elemento no tiene `value` (p.ej. `contenteditable`).
+_JS_SET_VALUE = (
+    "const el = arguments[0];"
+    "if (!('value' in el)) return false;"
+    "const v = arguments[2] ? arguments[1] : el.value + arguments[1];"
+    "const desc = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');"
+    "if (desc && desc.set) desc.set.call(el, v); else el.value = v;"
+    "el.dispatchEvent(new Event('input', {bubbles: true}));"
+    "el.dispatchEvent(new Event('change', {bubbles: true}));"
+    "return true;"
+)
+
+# Caché de instancias `WebDriverWait` por driver y (timeout, poll). `WebDriverWait` no
+# guarda estado entre llamadas a `until`, así que puede reutilizarse. Las claves son
+# débiles: la entrada desaparece cuando el driver deja de usarse.
+_wait_cache: weakref.WeakKeyDictionary[WebDriver, dict[tuple[float, float], WebDriverWait]] = (
+    weakref.WeakKeyDictionary()
+)
+
+# Tipos de `By` que el script de `wait_all_visible` sabe resolver en el navegador
+_JS_LOCATOR_KINDS = {
+    By.ID: "id",
+    By.CSS_SELECTOR: "css",
+    By.XPATH: "xpath",
+    By.NAME: "name",
+    By.CLASS_NAME: "class",
+    By.TAG_NAME: "tag",
+}
+
+# Sondea dentro del navegador hasta que todos los locators son visibles a la vez
+# (o vence el plazo) y devuelve los elementos en una sola respuesta.
+_JS_WAIT_ALL_VISIBLE = """
+const [locators, timeoutMs, done] = arguments;
+const find = ([kind, sel]) => {
+  switch (kind) {
+    case "id": return document.getElementById(sel);
+    case "css": return document.querySelector(sel);
+    case "xpath": return document.evaluate(
+      sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    case "name": return document.getElementsByName(sel)[0] || null;
+    case "class": return document.getElementsByClassName(sel)[0] || null;
+    case "tag": return document.getElementsByTagName(sel)[0] || null;
+  }
+  return null;
+};
+const visible = (el) => {
+  if (!el || !el.getClientRects().length) return false;
+  const st = window.getComputedStyle(el);
+  if (st.visibility === "hidden" || st.display === "none") return false;
+  // Opacidad efectiva acumulando la de los ancestros (como `bot.dom.getOpacity`)
+  let opacity = 1;
+  for (let n = el; n && n.nodeType === Node.ELEMENT_NODE; n = n.parentElement) {
+    opacity *= parseFloat(window.getComputedStyle(n).opacity);
+    if (opacity === 0) return false;
+  }
+  return true;
+};
+const deadline = Date.now() + timeoutMs;
+const check = () => {
+  const els = locators.map(find);
+  if (els.every(visible)) { clearInterval(timer); done(els); }
+  else if (Date.now() >= deadline) { clearInterval(timer); done(null); }
+};
+const timer = setInterval(check, 50);
+check();
+"""
+
+
+def _get_wait(driver: WebDriver, timeout: float, poll: float = DEFAULT_POLL) -> WebDriverWait:
+    waits = _wait_cache.get(driver)
+    if waits is None:
+        waits = _wait_cache[driver] = {}
+    w = waits.get((timeout, poll))
+    if w is None:
+        # La espera recibe un proxy débil: si guardase el driver, la clave de
+        # `_wait_cache` nunca podría liberarse
+        w = waits[(timeout, poll)] = WebDriverWait(weakref.proxy(driver), timeout=timeout, poll_frequency=poll)
+    return w
+
+
+# Script timeout conocido por driver (`None` = sin límite), para no consultar
+# `driver.timeouts` (una llamada `GET_TIMEOUTS`) en cada `wait_all_visible`
+_script_timeouts: weakref.WeakKeyDictionary[WebDriver, float | None] = weakref.WeakKeyDictionary()
+
+
+def _ensure_script_timeout(driver: WebDriver, seconds: float) -> None:
+    # Garantiza un script timeout de al menos `seconds`. Solo se amplía (nunca se
+    # reduce ni se restaura), así que en el caso habitual no cuesta ninguna llamada.
+    if driver not in _script_timeouts:
+        try:
+            _script_timeouts[driver] = driver.timeouts.script
+        except TypeError:
+            # Selenium hace `None / 1000` si la sesión no tiene límite de script
+            _script_timeouts[driver] = None
+    current = _script_timeouts[driver]
+    if current is not None and current < seconds:
+        driver.set_script_timeout(seconds)
+        _script_timeouts[driver] = seconds
 
 
 class AuxiliaryMethods:
@@ -23,24 +131,91 @@ class AuxiliaryMethods:
     """
 
     @staticmethod
-    def wait(driver: WebDriver, timeout: int = DEFAULT_TIMEOUT) -> WebDriverWait:
-        return WebDriverWait(driver, timeout=timeout, poll_frequency=DEFAULT_POLL)
+    def wait(driver: WebDriver, timeout: int = DEFAULT_TIMEOUT, poll: float = DEFAULT_POLL) -> WebDriverWait:
+        return _get_wait(driver, timeout, poll)
+
+    @staticmethod
+    def _wait_present_noexc(
+        driver: WebDriver,
+        locator: Locator,
+        timeout: float,
+        poll: float = DEFAULT_POLL,
+    ) -> WebElement:
+        # Como `presence_of_element_located`, pero con `find_elements`: un sondeo
+        # fallido devuelve `[]` en vez de lanzar `NoSuchElementException`.
+        deadline = time.monotonic() + timeout
+        while True:
+            els = driver.find_elements(*locator)
+            if els:
+                return els[0]
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"Elemento no presente tras {timeout}s: {locator}")
+            time.sleep(poll)
+
+    @staticmethod
+    def wait_present(
+        driver: WebDriver,
+        locator: Locator,
+        timeout: int = DEFAULT_TIMEOUT,
+        *,
+        poll: float = DEFAULT_POLL,
+    ) -> WebElement:
+        return AuxiliaryMethods._wait_present_noexc(driver, locator, timeout, poll)
 
     @staticmethod
-    def wait_present(driver: WebDriver, locator: Locator, timeout: int = DEFAULT_TIMEOUT) -> WebElement:
-        return AuxiliaryMethods.wait(driver, timeout).until(EC.presence_of_element_located(locator))
+    def wait_visible(
+        driver: WebDriver,
+        locator: Locator,
+        timeout: int = DEFAULT_TIMEOUT,
+        *,
+        poll: float = DEFAULT_POLL,
+    ) -> WebElement:
+        return AuxiliaryMethods.wait(driver, timeout, poll).until(EC.visibility_of_element_located(locator))
 
     @staticmethod
-    def wait_visible(driver: WebDriver, locator: Locator, timeout: int = DEFAULT_TIMEOUT) -> WebElement:
-        return AuxiliaryMethods.wait(driver, timeout).until(EC.visibility_of_element_located(locator))
+    def wait_all_visible(
+        driver: WebDriver,
+        locators: list[Locator],
+        timeout: int = DEFAULT_TIMEOUT,
+    ) -> list[WebElement]:
+        """
+        Espera a que todos los `locators` sean visibles con un único
+        `execute_async_script` que sondea dentro del navegador, en lugar de
+        una espera explícita por locator. Si algún locator no se puede
+        expresar en JS (p.ej. `By.LINK_TEXT`), hace las esperas una a una.
+        """
+        if any(by not in _JS_LOCATOR_KINDS for by, _ in locators):
+            return [AuxiliaryMethods.wait_visible(driver, loc, timeout) for loc in locators]
+        if not locators:
+            return []
+
+        js_locators = [[_JS_LOCATOR_KINDS[by], sel] for by, sel in locators]
+        # El script necesita un script timeout algo mayor que su propio plazo
+        _ensure_script_timeout(driver, timeout + 1)
+        els = driver.execute_async_script(_JS_WAIT_ALL_VISIBLE, js_locators, int(timeout * 1000))
+        if els is None:
+            raise TimeoutException(f"Elementos no visibles tras {timeout}s: {locators}")
+        return els
 
     @staticmethod
-    def wait_clickable(driver: WebDriver, locator: Locator, timeout: int = DEFAULT_TIMEOUT) -> WebElement:
-        return AuxiliaryMethods.wait(driver, timeout).until(EC.element_to_be_clickable(locator))
+    def wait_clickable(
+        driver: WebDriver,
+        locator: Locator,
+        timeout: int = DEFAULT_TIMEOUT,
+        *,
+        poll: float = DEFAULT_POLL,
+    ) -> WebElement:
+        return AuxiliaryMethods.wait(driver, timeout, poll).until(EC.element_to_be_clickable(locator))
 
     @staticmethod
-    def wait_invisible(driver: WebDriver, locator: Locator, timeout: int = DEFAULT_TIMEOUT) -> bool:
-        return AuxiliaryMethods.wait(driver, timeout).until(EC.invisibility_of_element_located(locator))
+    def wait_invisible(
+        driver: WebDriver,
+        locator: Locator,
+        timeout: int = DEFAULT_TIMEOUT,
+        *,
+        poll: float = DEFAULT_POLL,
+    ) -> bool:
+        return AuxiliaryMethods.wait(driver, timeout, poll).until(EC.invisibility_of_element_located(locator))
 
     @staticmethod
     def click(driver: WebDriver, locator: Locator, timeout: int = DEFAULT_TIMEOUT) -> None:
@@ -55,8 +230,19 @@ class AuxiliaryMethods:
         *,
         clear: bool = True,
         timeout: int = DEFAULT_TIMEOUT,
+        use_js: bool = False,
     ) -> None:
+        """
+        Escribe `text` en el campo. Con `use_js` o textos largos asigna el valor
+        por JS (una sola llamada al driver); si el elemento no tiene `value`
+        (p.ej. `contenteditable`) vuelve a `send_keys`. Si el campo necesita
+        eventos de teclado reales, usar `use_js=False` con textos cortos.
+        """
         el = AuxiliaryMethods.wait_visible(driver, locator, timeout)
+        if use_js or len(text) >= JS_TYPE_MIN_LEN:
+            if driver.execute_script(_JS_SET_VALUE, el, text, clear):
+                return
+            # Sin propiedad `value`: se escribe con `send_keys`
         if clear:
             el.clear()
         el.send_keys(text)
@@ -67,13 +253,40 @@ class AuxiliaryMethods:
         return el.text
 
     @staticmethod
-    def exists(driver: WebDriver, locator: Locator, timeout: int = 2) -> bool:
+    def get_text_fast(driver: WebDriver, locator: Locator) -> str:
+        # Sin espera: asume que el elemento ya está presente y visible (una sola
+        # búsqueda). Para páginas que aún cargan, usar `get_text`.
+        return driver.find_element(*locator).text
+
+    @staticmethod
+    def exists(driver: WebDriver, locator: Locator, timeout: float | None = None) -> bool:
+        """
+        Comprueba si el elemento está presente usando `find_elements`, que
+        devuelve `[]` en lugar de lanzar excepción. Por defecto usa
+        `NEGATIVE_TIMEOUT` (`SELENIUM_NEG_TIMEOUT`, 0 = una única consulta al
+        driver); con `timeout>0` reintenta cada `DEFAULT_POLL`.
+        """
+        if timeout is None:
+            timeout = NEGATIVE_TIMEOUT
         try:
-            AuxiliaryMethods.wait_present(driver, locator, timeout)
+            AuxiliaryMethods._wait_present_noexc(driver, locator, timeout)
             return True
         except TimeoutException:
             return False
 
     @staticmethod
-    def wait_url_contains(driver: WebDriver, fragment: str, timeout: int = DEFAULT_TIMEOUT) -> bool:
-        return AuxiliaryMethods.wait(driver, timeout).until(EC.url_contains(fragment))
+    def wait_url_contains(
+        driver: WebDriver,
+        fragment: str,
+        timeout: int = DEFAULT_TIMEOUT,
+        *,
+        poll: float = DEFAULT_POLL,
+    ) -> bool:
+        """
+        Espera a que la URL actual contenga `fragment`. Si ya la contiene
+        (caso habitual tras un `click` que navega) devuelve con una sola
+        consulta, sin crear la espera; si no, sondea cada `poll` segundos.
+        """
+        if fragment in driver.current_url:
+            return True
+        return AuxiliaryMethods.wait(driver, timeout, poll).until(EC.url_contains(fragment))
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import os
+import re
+import shutil
 import logging
+import tempfile
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Literal
+from typing import Any, Callable, Literal, NamedTuple
 
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchDriverException, WebDriverException
@@ -17,6 +22,100 @@ from selenium.webdriver.firefox.service import Service as FirefoxService
 Browser = Literal["chrome", "edge", "firefox"]
 # Logger del módulo
 log = logging.getLogger(__name__)
+# Línea `key=value` que no sea comentario (`#`, `;`) ni esté vacía; los grupos
+# ya salen sin espacios alrededor (tolera finales de línea `\r\n`)
+_PROP_RE = re.compile(r"^[ \t]*([^#;=\s][^=\r\n]*?)[ \t]*=[ \t]*([^\r\n]*?)[ \t\r]*$", re.M)
+
+
+@functools.cache
+def _repo_root() -> Path:
+    # Busca hacia arriba en los padres del archivo hasta encontrar
+    # un directorio que contenga tanto `tests` como `drivers`.
+    # El resultado no cambia durante el proceso, así que se cachea.
+    here = Path(__file__).resolve()
+    for p in [here] + list(here.parents):
+        if (p / "tests").is_dir() and (p / "drivers").is_dir():
+            return p
+    # Fallback razonable si no encuentra la estructura esperada
+    return here.parents[2]
+
+
+class _BrowserSpec(NamedTuple):
+    # Todo lo que varía entre navegadores, en un único sitio
+    driver_cls: Callable[..., webdriver.Remote]
+    options_cls: Callable[[], Any]
+    service_cls: Callable[..., Any]
+    headless_arg: str
+    local_driver: tuple[str, ...]  # ruta del driver local relativa a la raíz del repo
+
+
+_BROWSER_SPEC: dict[str, _BrowserSpec] = {
+    "chrome": _BrowserSpec(
+        webdriver.Chrome, webdriver.ChromeOptions, ChromeService,
+        "--headless=new", ("drivers", "chromedriver-win64", "chromedriver.exe"),
+    ),
+    "edge": _BrowserSpec(
+        webdriver.Edge, webdriver.EdgeOptions, EdgeService,
+        "--headless=new", ("drivers", "edge", "msedgedriver.exe"),
+    ),
+    "firefox": _BrowserSpec(
+        webdriver.Firefox, webdriver.FirefoxOptions, FirefoxService,
+        "-headless", ("drivers", "firefox", "geckodriver.exe"),
+    ),
+}
+
+
+def _spec(browser: str) -> _BrowserSpec:
+    try:
+        return _BROWSER_SPEC[browser]
+    except KeyError:
+        raise ValueError("browser debe ser: chrome | edge | firefox") from None
+
+
+@functools.cache
+def _driver_path_cached(browser: str) -> str:
+    # Ruta del driver local; se resuelve una vez por navegador
+    return str(WebdriverFactory._local_driver_path(_repo_root(), browser))
+
+
+@functools.cache
+def _driver_exists(browser: str) -> bool:
+    return os.path.isfile(_driver_path_cached(browser))
+
+
+# Recursos que se bloquean con `block_resources` (imágenes, fuentes y analítica).
+# No incluye CSS: las pruebas de visibilidad dependen de los estilos.
+_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics*", "*googletagmanager*", "*doubleclick*",
+]
+
+
+# Sistema de ficheros en RAM para los perfiles de `ram_profile` (solo Linux)
+_RAM_DIR = "/dev/shm"
+
+
+def _remove_profile_on_quit(driver: webdriver.Remote, profile_dir: str) -> None:
+    # Envuelve `quit` del driver para borrar su perfil temporal al cerrarlo
+    original_quit = driver.quit
+
+    def quit() -> None:
+        try:
+            original_quit()
+        finally:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    driver.quit = quit  # type: ignore[method-assign]
+
+
+def _build_options(browser: str, headless: bool) -> Any:
+    # Construye las opciones específicas del navegador (p.ej. modo headless)
+    spec = _spec(browser)
+    options = spec.options_cls()
+    if headless:
+        options.add_argument(spec.headless_arg)
+    return options
 
 
 class WebdriverFactory:
@@ -32,20 +131,13 @@ class WebdriverFactory:
     variables de entorno (útil en CI).
     """
 
-    # Caché de parámetros leídos desde el fichero .properties
-    _param_cache: dict[str, str] | None = None
+    # Caché de parámetros leídos desde el fichero .properties: (mtime_ns, size, datos)
+    _param_cache: tuple[int, int, dict[str, str]] | None = None
 
     # ---------- config (.properties) ----------
     @staticmethod
     def _find_repo_root() -> Path:
-        # Busca hacia arriba en los padres del archivo hasta encontrar
-        # un directorio que contenga tanto `tests` como `drivers`.
-        here = Path(__file__).resolve()
-        for p in [here] + list(here.parents):
-            if (p / "tests").is_dir() and (p / "drivers").is_dir():
-                return p
-        # Fallback razonable si no encuentra la estructura esperada
-        return here.parents[2]
+        return _repo_root()
 
     @staticmethod
     def _properties_path() -> Path:
@@ -60,26 +152,36 @@ class WebdriverFactory:
         - Ignora líneas vacías y comentarios que empiezan por `#` o `;`.
         - Espera pares `key=value` y recorta espacios.
         """
-        data: dict[str, str] = {}
-        if not path.exists():
-            raise FileNotFoundError(f"No existe el fichero de parametrización: {path}")
-
-        for raw in path.read_text(encoding="utf-8").splitlines():
-            line = raw.strip()
-            if not line or line.startswith("#") or line.startswith(";"):
-                continue
-            if "=" not in line:
-                continue
-            k, v = line.split("=", 1)
-            data[k.strip()] = v.strip()
-        return data
+        # Lectura directa por descriptor (sin TextIOWrapper): el fichero es pequeño
+        chunks: list[bytes] = []
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No existe el fichero de parametrización: {path}") from None
+        try:
+            while chunk := os.read(fd, 65536):
+                chunks.append(chunk)
+        finally:
+            os.close(fd)
+        text = b"".join(chunks).decode("utf-8")
+        return dict(_PROP_RE.findall(text))
 
     @staticmethod
     def load_parametrization(force_reload: bool = False) -> dict[str, str]:
-        # Carga y cachea los parámetros desde el fichero .properties
-        if WebdriverFactory._param_cache is None or force_reload:
-            WebdriverFactory._param_cache = WebdriverFactory._read_properties(WebdriverFactory._properties_path())
-        return WebdriverFactory._param_cache
+        # Carga y cachea los parámetros; solo vuelve a parsear si cambia mtime/tamaño
+        path = WebdriverFactory._properties_path()
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No existe el fichero de parametrización: {path}") from None
+
+        cached = WebdriverFactory._param_cache
+        if cached is not None and not force_reload and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+
+        data = WebdriverFactory._read_properties(path)
+        WebdriverFactory._param_cache = (st.st_mtime_ns, st.st_size, data)
+        return data
 
     @staticmethod
     def get_param(key: str, default: str | None = None) -> str | None:
@@ -123,6 +225,8 @@ class WebdriverFactory:
             "se_proxy": "SE_PROXY",
             "se_cache_path": "SE_CACHE_PATH",
             "se_offline": "SE_OFFLINE",
+            "block_resources": "BLOCK_RESOURCES",
+            "page_load_strategy": "PAGE_LOAD_STRATEGY",
         }
 
         merged = dict(params)
@@ -136,13 +240,7 @@ class WebdriverFactory:
     @staticmethod
     def _local_driver_path(root: Path, browser: Browser) -> Path:
         # Devuelve la ruta esperada del ejecutable del driver local según el navegador
-        if browser == "chrome":
-            return root / "drivers" / "chromedriver-win64" / "chromedriver.exe"
-        if browser == "edge":
-            return root / "drivers" / "edge" / "msedgedriver.exe"
-        if browser == "firefox":
-            return root / "drivers" / "firefox" / "geckodriver.exe"
-        raise ValueError("browser debe ser: chrome | edge | firefox")
+        return root.joinpath(*_spec(browser).local_driver)
 
     @staticmethod
     def create_from_properties() -> webdriver.Remote:
@@ -152,17 +250,22 @@ class WebdriverFactory:
         los parámetros (browser, headless, timeouts, window, etc.).
         """
         params = WebdriverFactory.load_parametrization()
-        params = WebdriverFactory._overlay_env(params)
+        # Solo se copia/mezcla con env vars si `CONFIG_PRECEDENCE=env`; si no, se
+        # usa directamente el dict cacheado (no se modifica en este método)
+        if os.getenv("CONFIG_PRECEDENCE", "file").strip().lower() == "env":
+            params = WebdriverFactory._overlay_env(params)
 
         # Determina el navegador a usar, con validación básica
         browser = (params.get("browser", "chrome") or "chrome").lower()
-        if browser not in ("chrome", "edge", "firefox"):
+        if browser not in _BROWSER_SPEC:
             browser = "chrome"
         browser = browser  # type: ignore
 
         # Flags y preferencias
         headless = WebdriverFactory._as_bool(params.get("headless"), default=False)
         prefer_manager = WebdriverFactory._as_bool(params.get("prefer_manager"), default=True)
+        block_resources = WebdriverFactory._as_bool(params.get("block_resources"), default=False)
+        page_load_strategy = (params.get("page_load_strategy") or "").strip().lower() or None
 
         # Timeouts: usa `timeout` como fallback si no se especifican por separado
         timeout_fallback = WebdriverFactory._as_float(params.get("timeout"), default=None)
@@ -185,6 +288,8 @@ class WebdriverFactory:
             implicit_wait_s=0,  # recomendado: usar esperas explícitas con WebDriverWait
             page_load_timeout_s=page_load_timeout,
             script_timeout_s=script_timeout,
+            block_resources=block_resources,
+            page_load_strategy=page_load_strategy,
         )
 
         # Opcional: ajustar el tamaño/estado de la ventana según `window` en config
@@ -207,84 +312,143 @@ class WebdriverFactory:
         implicit_wait_s: float = 0,
         page_load_timeout_s: float | None = None,
         script_timeout_s: float | None = None,
+        block_resources: bool = False,
+        page_load_strategy: str | None = None,
+        ram_profile: bool | None = None,
     ) -> webdriver.Remote:
         """
         Crea el `webdriver` concreto para el `browser` indicado.
 
         - Construye opciones específicas por navegador (p.ej. modo headless).
+        - Con `block_resources` evita descargar imágenes, fuentes y analítica
+          (CDP en Chrome/Edge, preferencias en Firefox).
+        - `page_load_strategy` (`normal` | `eager` | `none`): por defecto `eager`
+          si no hay espera implícita (el código ya usa esperas explícitas) y
+          `normal` en caso contrario.
+        - `ram_profile`: perfil del navegador en un directorio temporal en RAM
+          (`/dev/shm`) y sin caché de disco; se borra al hacer `quit()`. Por
+          defecto activo en headless o en CI (`CI`); se ignora si no existe
+          `/dev/shm` (p.ej. Windows).
         - Define dos constructorres: `manager_ctor` (Selenium Manager) y
           `local_ctor` (driver local usando `Service(executable_path=...)`).
         - Si `prefer_manager` está activado intenta primero el manager y
           hace fallback al driver local si falla.
         """
         browser = browser.lower()  # type: ignore
-        root = WebdriverFactory._find_repo_root()
-        driver_path = WebdriverFactory._local_driver_path(root, browser)
+        driver_path = _driver_path_cached(browser)
 
         # Configuración por navegador: opciones y constructores
-        if browser == "chrome":
-            options = webdriver.ChromeOptions()
-            if headless:
-                options.add_argument("--headless=new")
-            manager_ctor = lambda: webdriver.Chrome(options=options)
-            local_ctor = lambda: webdriver.Chrome(
-                service=ChromeService(executable_path=str(driver_path)),
-                options=options,
-            )
-
-        elif browser == "edge":
-            options = webdriver.EdgeOptions()
-            if headless:
-                options.add_argument("--headless=new")
-            manager_ctor = lambda: webdriver.Edge(options=options)
-            local_ctor = lambda: webdriver.Edge(
-                service=EdgeService(executable_path=str(driver_path)),
-                options=options,
-            )
+        spec = _spec(browser)
+        options = _build_options(browser, headless)
+        if page_load_strategy is None:
+            page_load_strategy = "eager" if not implicit_wait_s else "normal"
+        if page_load_strategy not in ("normal", "eager", "none"):
+            raise ValueError("page_load_strategy debe ser: normal | eager | none")
+        options.page_load_strategy = page_load_strategy
+        if ram_profile is None:
+            ram_profile = headless or WebdriverFactory._as_bool(os.getenv("CI"))
+        profile_dir: str | None = None
+        if ram_profile and os.path.isdir(_RAM_DIR):
+            profile_dir = tempfile.mkdtemp(prefix="wd-profile-", dir=_RAM_DIR)
+            if browser == "firefox":
+                options.add_argument("-profile")
+                options.add_argument(profile_dir)
+                options.set_preference("browser.cache.disk.enable", False)
+            else:
+                options.add_argument(f"--user-data-dir={profile_dir}")
+                options.add_argument("--disk-cache-size=1")
+        if block_resources and browser == "firefox":
+            options.set_preference("permissions.default.image", 2)
+            options.set_preference("browser.display.use_document_fonts", 0)
+        manager_ctor = lambda: spec.driver_cls(options=options)
+        local_ctor = lambda: spec.driver_cls(
+            service=spec.service_cls(executable_path=driver_path),
+            options=options,
+        )
 
-        elif browser == "firefox":
-            options = webdriver.FirefoxOptions()
-            if headless:
-                options.add_argument("-headless")
-            manager_ctor = lambda: webdriver.Firefox(options=options)
-            local_ctor = lambda: webdriver.Firefox(
-                service=FirefoxService(executable_path=str(driver_path)),
-                options=options,
+        def start() -> webdriver.Remote:
+            # Intento con Selenium Manager si está preferido
+            if prefer_manager:
+                try:
+                    d = manager_ctor()
+                    WebdriverFactory._apply_timeouts(
+                        d,
+                        implicit_wait_s=implicit_wait_s,
+                        page_load_timeout_s=page_load_timeout_s,
+                        script_timeout_s=script_timeout_s,
+                    )
+                    if block_resources:
+                        WebdriverFactory._block_resources(d)
+                    return d
+                except (NoSuchDriverException, WebDriverException) as e:
+                    # Si falla el manager, se registra la razón y se continúa con local
+                    log.warning(
+                        "Selenium Manager falló (%s). Fallback a driver local: %s",
+                        e.__class__.__name__,
+                        driver_path,
+                    )
+
+            # Verifica que exista el ejecutable local antes de intentar usarlo
+            if not _driver_exists(browser):
+                raise FileNotFoundError(f"No encuentro el driver local para {browser}: {driver_path}")
+
+            d = local_ctor()
+            WebdriverFactory._apply_timeouts(
+                d,
+                implicit_wait_s=implicit_wait_s,
+                page_load_timeout_s=page_load_timeout_s,
+                script_timeout_s=script_timeout_s,
             )
-        else:
-            raise ValueError("browser debe ser: chrome | edge | firefox")
+            if block_resources:
+                WebdriverFactory._block_resources(d)
+            return d
+
+        if profile_dir is None:
+            return start()
+        try:
+            d = start()
+        except BaseException:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        _remove_profile_on_quit(d, profile_dir)
+        return d
 
-        # Intento con Selenium Manager si está preferido
-        if prefer_manager:
+    @staticmethod
+    def create_many(browsers: list[Browser], **kwargs: Any) -> list[webdriver.Remote]:
+        """
+        Crea un driver por cada navegador de `browsers` en paralelo (el arranque
+        es sobre todo espera al proceso del driver). Acepta los mismos kwargs
+        que `create_driver`. Si alguno falla, cierra los ya creados y relanza.
+        """
+        if not browsers:
+            return []
+        with ThreadPoolExecutor(max_workers=len(browsers)) as ex:
+            futures = [ex.submit(WebdriverFactory.create_driver, b, **kwargs) for b in browsers]
+
+        drivers: list[webdriver.Remote] = []
+        error: BaseException | None = None
+        for f in futures:
             try:
-                d = manager_ctor()
-                WebdriverFactory._apply_timeouts(
-                    d,
-                    implicit_wait_s=implicit_wait_s,
-                    page_load_timeout_s=page_load_timeout_s,
-                    script_timeout_s=script_timeout_s,
-                )
-                return d
-            except (NoSuchDriverException, WebDriverException) as e:
-                # Si falla el manager, se registra la razón y se continúa con local
-                log.warning(
-                    "Selenium Manager falló (%s). Fallback a driver local: %s",
-                    e.__class__.__name__,
-                    driver_path,
-                )
-
-        # Verifica que exista el ejecutable local antes de intentar usarlo
-        if not driver_path.exists():
-            raise FileNotFoundError(f"No encuentro el driver local para {browser}: {driver_path}")
-
-        d = local_ctor()
-        WebdriverFactory._apply_timeouts(
-            d,
-            implicit_wait_s=implicit_wait_s,
-            page_load_timeout_s=page_load_timeout_s,
-            script_timeout_s=script_timeout_s,
-        )
-        return d
+                drivers.append(f.result())
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            for d in drivers:
+                d.quit()
+            raise error
+        return drivers
+
+    @staticmethod
+    def _block_resources(driver: webdriver.Remote) -> None:
+        # Bloquea por CDP las URLs de `_BLOCKED_URLS` (solo navegadores Chromium;
+        # Firefox lo resuelve con preferencias al crear las opciones)
+        if not hasattr(driver, "execute_cdp_cmd"):
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
+        except WebDriverException as e:
+            log.warning("No se pudieron bloquear recursos por CDP (%s)", e.__class__.__name__)
 
     @staticmethod
     def _apply_timeouts(
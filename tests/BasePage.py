@@ -1,10 +1,33 @@
+import atexit
+import functools
+
 from drivers.webdrivers.WebdriverFactory import WebdriverFactory
 from drivers.webdrivers.AuxiliaryMethods import AuxiliaryMethods as AM
 
+
+@functools.cache
+def get_driver():
+    # Driver compartido por todas las Pages: se crea al primer uso, no al importar
+    driver = WebdriverFactory.create_from_properties()
+    atexit.register(quit_driver, driver)
+    return driver
+
+
+def quit_driver(driver):
+    # Cierra el driver compartido (al salir o vía `BasePage.quit`) y limpia la caché
+    atexit.unregister(quit_driver)
+    get_driver.cache_clear()
+    driver.quit()
+
+
+def get_base_url():
+    return WebdriverFactory.get_param("url")
+
+
 class BasePage:
     def __init__(self, driver=None):
-        self.driver = driver or WebdriverFactory.create_from_properties()
-        self.base_url = WebdriverFactory.get_param("url")
+        self.driver = driver or get_driver()
+        self.base_url = get_base_url()
 
     def open_home(self):
         self.driver.get(self.base_url)
@@ -20,4 +43,7 @@ class BasePage:
     AM = AM
 
     def quit(self):
-        self.driver.quit()
+        if get_driver.cache_info().currsize and self.driver is get_driver():
+            quit_driver(self.driver)
+        else:
+            self.driver.quit()
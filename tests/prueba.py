@@ -1,15 +1,21 @@
-from selenium import webdriver
+import sys
+from pathlib import Path
+
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Permite ejecutar tanto `python tests/prueba.py` como `python -m tests.prueba`
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tests.BasePage import get_driver, quit_driver  # noqa: E402
+
 
 def main():
-    # Si tienes Chrome instalado:
-    # driver = webdriver.Chrome()  # Selenium Manager se encarga del driver
-    # Alternativas:
-    # driver = webdriver.Edge()
-    driver = webdriver.Firefox()
+    # Usa el driver compartido (navegador según `elements/parametrization.properties`)
+    driver = get_driver()
 
     try:
         # driver.get("https://the-internet.herokuapp.com/")
@@ -28,7 +34,7 @@ def main():
 
         print("OK: navegación y aserción pasaron.")
     finally:
-        driver.quit()
+        quit_driver(driver)
 
 
 if __name__ == "__main__":